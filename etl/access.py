@@ -39,29 +39,34 @@ class AccessExporter:
             cursor = conn.cursor()
             return [row.table_name for row in cursor.tables() if row.table_type == 'TABLE']
     
-    def export_table(self, table_name):
+    def export_table(self, table_name, batch_size=10000):
         csv_path = self.export_dir / f"{table_name}.csv"
         
         with pyodbc.connect(self.conn_str) as conn:
             cursor = conn.cursor()
             cursor.execute(f"SELECT * FROM [{table_name}]")
             
-            # Get column names and data
+            # Get column names; rows are streamed in batches below
             columns = [col[0] for col in cursor.description]
-            rows = cursor.fetchall()
             
             # Use DuckDB for fast CSV export with proper column names
             duck = duckdb.connect()
             
-            # Create VALUES clause with proper column aliases
-            column_aliases = ", ".join([f"col{i} AS \"{col}\"" for i, col in enumerate(columns)])
-            values_rows = ",".join([f"({','.join(['?' for _ in columns])})" for _ in rows])
+            # Columns are VARCHAR so a batch of NULLs can't pin the wrong type for later batches
+            column_defs = ", ".join([f'"{col}" VARCHAR' for col in columns])
+            duck.execute(f"CREATE TABLE temp ({column_defs})")
             
-            duck.execute(f"""
-                CREATE TABLE temp AS 
-                SELECT {column_aliases} 
-                FROM (VALUES {values_rows})
-            """, [item for row in rows for item in row])
+            row_placeholder = f"({','.join(['?' for _ in columns])})"
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                
+                values_rows = ",".join([row_placeholder for _ in rows])
+                duck.execute(
+                    f"INSERT INTO temp SELECT * FROM (VALUES {values_rows})",
+                    [item for row in rows for item in row]
+                )
             
             duck.execute(f"COPY temp TO '{csv_path}' (FORMAT CSV, HEADER)")
             
@@ -3,15 +3,18 @@ import gc
 import csv
 import duckdb
 import psycopg
+from psycopg.conninfo import make_conninfo
 import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 from loguru import logger
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 
 load_dotenv()
 log = logger.bind(tags=['sources'])
 
+CHUNK_IO_BUFFER = 1 << 20
+
 def get_file_size_gb(filepath: str) -> float:
     try:
         return os.path.getsize(filepath) / (1024**3)
@@ -27,7 +30,7 @@ def load_csv_with_duckdb_autodetect(filepath: str, conn: duckdb.DuckDBPyConnecti
             log.debug(f"Trying DuckDB auto-detect with {encoding} encoding")
             
             conn.execute(f"DROP TABLE IF EXISTS {table_name} CASCADE")
-            conn.execute(f"""
+            count = conn.execute(f"""
                 CREATE TABLE {table_name} AS 
                 SELECT * FROM read_csv(
                     '{filepath}',
@@ -36,9 +39,7 @@ def load_csv_with_duckdb_autodetect(filepath: str, conn: duckdb.DuckDBPyConnecti
                     all_varchar=true,
                     encoding='{encoding}'
                 )
-            """)
-            
-            count = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            """).fetchone()[0]
             if count > 0:
                 columns_info = conn.execute(f"DESCRIBE {table_name}").fetchall()
                 column_count = len(columns_info)
@@ -67,10 +68,11 @@ def get_files_from_path(path: str) -> List[Tuple[str, str]]:
         return [(path_obj.stem, str(path_obj))]
 
     files = []
-    for file_path in path_obj.rglob('*'):
-        if file_path.is_file() and file_path.suffix.lower() in ['.csv', '.tsv', '.txt']:
-            key = file_path.stem
-            files.append((key, str(file_path)))
+    for dirpath, _, filenames in os.walk(path_obj):
+        for filename in filenames:
+            stem, suffix = os.path.splitext(filename)
+            if suffix.lower() in ['.csv', '.tsv', '.txt']:
+                files.append((stem, os.path.join(dirpath, filename)))
     
     log.info(f"Found {len(files)} files in directory: {path}")
     return files
@@ -97,8 +99,8 @@ def create_smart_filter(filter_condition: str, available_columns: List[str]) ->
     
     return adjusted_filter
 
-def get_postgres_connection() -> psycopg.Connection:
-    return psycopg.connect(
+def get_postgres_conninfo() -> str:
+    return make_conninfo(
         host=os.getenv('POSTGRES_HOST', 'localhost'),
         port=os.getenv('POSTGRES_PORT', '5432'),
         dbname=os.getenv('POSTGRES_DB'),
@@ -106,22 +108,42 @@ def get_postgres_connection() -> psycopg.Connection:
         password=os.getenv('POSTGRES_PASSWORD')
     )
 
+def get_postgres_connection() -> psycopg.Connection:
+    return psycopg.connect(get_postgres_conninfo())
+
+def postgres_table_name(table_name: str, schema_name: str = 'raw') -> str:
+    clean_name = table_name.lower().replace('-', '_').replace(' ', '_')
+    return f"{schema_name}.{clean_name}"
+
+def postgres_table_ddl(table_name: str, columns_info: List, schema_name: str = 'raw') -> Tuple[str, List[str]]:
+    full_table = postgres_table_name(table_name, schema_name)
+
+    columns_def = ", ".join([f'"{col[0]}" TEXT' for col in columns_info])
+    
+    # Loaded without WAL; set_table_logged makes the table crash-safe once its rows are in
+    statements = [
+        f"CREATE SCHEMA IF NOT EXISTS {schema_name}",
+        f"DROP TABLE IF EXISTS {full_table} CASCADE",
+        f"CREATE UNLOGGED TABLE {full_table} ({columns_def})"
+    ]
+    return full_table, statements
+
 def create_postgres_table(table_name: str, columns_info: List, pg_conn: psycopg.Connection, schema_name:str = 'raw'):
+    full_table, statements = postgres_table_ddl(table_name, columns_info, schema_name)
     
     with pg_conn.cursor() as cur:
-        cur.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
-        
-        clean_name = table_name.lower().replace('-', '_').replace(' ', '_')
-        full_table = f"{schema_name}.{clean_name}"
-
-        columns_def = ", ".join([f'"{col[0]}" TEXT' for col in columns_info])
-        
-        cur.execute(f"DROP TABLE IF EXISTS {full_table} CASCADE")
-        cur.execute(f"CREATE TABLE {full_table} ({columns_def})")
+        for statement in statements:
+            cur.execute(statement)
         
         log.debug(f"Created table: {full_table}")
         return full_table
 
+def set_table_logged(full_table: str, pg_conn: psycopg.Connection):
+    with pg_conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {full_table} SET LOGGED")
+    
+    log.debug(f"Set table logged: {full_table}")
+
 def repair_and_load_csv(filepath: str, conn: duckdb.DuckDBPyConnection) -> int:
     log.debug(f"Attempting to repair CSV file: {filepath}")
     
@@ -129,39 +151,22 @@ def repair_and_load_csv(filepath: str, conn: duckdb.DuckDBPyConnection) -> int:
     repaired_path = os.path.join(temp_dir, f"repaired_{Path(filepath).name}")
     
     try:
-        with open(filepath, 'rb') as infile:
-            raw_data = infile.read()
-
-        text_data = None
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                text_data = raw_data.decode(encoding, errors='replace')
-                log.debug(f"Successfully decoded with {encoding} for repair")
-                break
-            except:
-                continue
-        
-        if not text_data:
-            raise Exception("Could not decode file for repair")
+        written_lines = 0
+        with open(filepath, 'rb', buffering=CHUNK_IO_BUFFER) as infile, \
+             open(repaired_path, 'w', encoding='utf-8', newline='', buffering=CHUNK_IO_BUFFER) as outfile:
+            for raw_line in infile:
+                cleaned = raw_line.decode('utf-8', errors='replace').replace('\x00', '').replace('\r', '').strip()
+                if cleaned:
+                    outfile.write(cleaned + '\n')
+                    written_lines += 1
         
-
-        lines = text_data.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            cleaned = line.replace('\x00', '').replace('\r', '').strip()
-            if cleaned:
-                cleaned_lines.append(cleaned)
-        
-
-        with open(repaired_path, 'w', encoding='utf-8', newline='') as outfile:
-            for line in cleaned_lines:
-                outfile.write(line + '\n')
+        if not written_lines:
+            raise Exception("Nothing to repair: file has no non-blank lines")
         
         log.debug(f"Created repaired file: {repaired_path}")
 
         conn.execute("DROP TABLE IF EXISTS source_data")
-        conn.execute(f"""
+        count = conn.execute(f"""
             CREATE TABLE source_data AS 
             SELECT * FROM read_csv(
                 '{repaired_path}',
@@ -169,9 +174,7 @@ def repair_and_load_csv(filepath: str, conn: duckdb.DuckDBPyConnection) -> int:
                 ignore_errors=true,
                 all_varchar=true
             )
-        """)
-        
-        count = conn.execute("SELECT COUNT(*) FROM source_data").fetchone()[0]
+        """).fetchone()[0]
         if count > 0:
             log.success(f"Repaired and loaded {count:,} rows")
             return count
@@ -263,9 +266,7 @@ def load_small_csv_to_duckdb(filepath: str, conn: duckdb.DuckDBPyConnection) ->
                 try:
                     log.debug(f"Trying option set {i+1}")
                     
-                    conn.execute(sql_query)
-                    
-                    count = conn.execute("SELECT COUNT(*) FROM source_data").fetchone()[0]
+                    count = conn.execute(sql_query).fetchone()[0]
                     if count > 0:
                         log.success(f"Loaded {count:,} rows with {encoding} encoding (option set {i+1})")
                         return count
@@ -296,59 +297,99 @@ def load_csv_to_duckdb(filepath: str, conn: duckdb.DuckDBPyConnection) -> int:
     else:
         raise Exception(f"File {filepath} is too large ({file_size_gb:.1f}GB) for standard loading. Use streaming approach.")
 
-def transfer_data_via_csv(
-        duck_conn  : duckdb.DuckDBPyConnection, 
-        pg_conn    : psycopg.Connection, 
-        table_name : str
+def copy_duckdb_table(
+        duck_conn    : duckdb.DuckDBPyConnection, 
+        cur          : psycopg.Cursor, 
+        source_table : str, 
+        target_table : str
     ) -> int:
 
     temp_dir = tempfile.gettempdir()
-    safe_name = table_name.replace('.', '_').replace('/', '_').replace('\\', '_')
-    temp_csv = os.path.join(temp_dir, f"{safe_name}_temp.csv")
+    safe_name = target_table.replace('.', '_').replace('/', '_').replace('\\', '_')
+    temp_csv = os.path.join(temp_dir, f"{safe_name}_{source_table}.csv")
     
     try:
-        duck_conn.execute(f"COPY source_data TO '{temp_csv}' (FORMAT CSV, HEADER)")
+        duck_conn.execute(f"COPY {source_table} TO '{temp_csv}' (FORMAT CSV, HEADER false)")
         
-        with pg_conn.cursor() as cur:
-            with open(temp_csv, 'r', encoding='utf-8') as f:
-                with cur.copy(f"COPY {table_name} FROM STDIN WITH CSV HEADER") as copy:
-                    while True:
-                        data = f.read(8192)
-                        if not data:
-                            break
-                        copy.write(data)
-
-            cur.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cur.fetchone()[0]
-            
-        pg_conn.commit()
-        log.success(f"Transferred and committed {count:,} rows to {table_name}")
-        return count
+        with open(temp_csv, 'rb') as f:
+            with cur.copy(f"COPY {target_table} FROM STDIN WITH (FORMAT csv)") as copy:
+                for data in iter(lambda: f.read(CHUNK_IO_BUFFER), b''):
+                    copy.write(data)
+        
+        return cur.rowcount
         
     finally:
         if os.path.exists(temp_csv):
             os.remove(temp_csv)
 
-def insert_small_file_standard(key: str, filepath: str, filter_condition: str = None):
-    duck_conn = duckdb.connect(':memory:')
+def transfer_data(
+        duck_conn  : duckdb.DuckDBPyConnection, 
+        pg_conn    : psycopg.Connection, 
+        table_name : str
+    ) -> int:
+
+    with pg_conn.cursor() as cur:
+        count = copy_duckdb_table(duck_conn, cur, "source_data", table_name)
     
+    set_table_logged(table_name, pg_conn)
+    pg_conn.commit()
+    log.success(f"Transferred and committed {count:,} rows to {table_name}")
+    return count
+
+def attach_postgres(duck_conn: duckdb.DuckDBPyConnection):
+    conninfo = get_postgres_conninfo().replace("'", "''")
+    duck_conn.execute("INSTALL postgres")
+    duck_conn.execute("LOAD postgres")
+    duck_conn.execute(f"ATTACH '{conninfo}' AS pg (TYPE POSTGRES)")
+    log.debug("Attached Postgres to DuckDB as pg")
+
+def transfer_data_via_attach(
+        duck_conn    : duckdb.DuckDBPyConnection, 
+        key          : str, 
+        columns_info : List
+    ) -> Tuple[str, int]:
+
+    full_table, statements = postgres_table_ddl(key, columns_info)
+    
+    # The table swap and the rows commit together, so a failed load keeps the previous table
+    duck_conn.execute("BEGIN")
+    try:
+        for statement in statements:
+            escaped = statement.replace("'", "''")
+            duck_conn.execute(f"CALL postgres_execute('pg', '{escaped}')")
+        count = duck_conn.execute(f"INSERT INTO pg.{full_table} SELECT * FROM source_data").fetchone()[0]
+        duck_conn.execute(f"CALL postgres_execute('pg', 'ALTER TABLE {full_table} SET LOGGED')")
+        duck_conn.execute("COMMIT")
+    except Exception:
+        duck_conn.execute("ROLLBACK")
+        raise
+    
+    log.success(f"Transferred and committed {count:,} rows to {full_table} via DuckDB")
+    return full_table, count
+
+def insert_small_file_standard(
+        key              : str, 
+        filepath         : str, 
+        pg_conn          : psycopg.Connection, 
+        duck_conn        : duckdb.DuckDBPyConnection, 
+        filter_condition : str = None
+    ):
+
     try:
         row_count = load_csv_to_duckdb(filepath, duck_conn)
         if filter_condition:
-            original_count = duck_conn.execute("SELECT COUNT(*) FROM source_data").fetchone()[0]
+            original_count = row_count
             columns_info = duck_conn.execute("DESCRIBE source_data").fetchall()
             column_names = [col[0] for col in columns_info]
             
             adjusted_filter = create_smart_filter(filter_condition, column_names)
             
             if adjusted_filter:
-                duck_conn.execute(f"""
+                filtered_count = duck_conn.execute(f"""
                     CREATE TABLE filtered_data AS 
                     SELECT * FROM source_data 
                     WHERE {adjusted_filter}
-                """)
-                
-                filtered_count = duck_conn.execute("SELECT COUNT(*) FROM filtered_data").fetchone()[0]
+                """).fetchone()[0]
                 duck_conn.execute("DROP TABLE source_data")
                 duck_conn.execute("ALTER TABLE filtered_data RENAME TO source_data")
                 
@@ -357,27 +398,65 @@ def insert_small_file_standard(key: str, filepath: str, filter_condition: str =
                 log.warning(f"Could not create valid filter, using unfiltered data")
         
         columns_info = duck_conn.execute("DESCRIBE source_data").fetchall()
-        pg_conn = get_postgres_connection()
         
         try:
+            _, final_count = transfer_data_via_attach(duck_conn, key, columns_info)
+        except Exception as e:
+            log.warning(f"DuckDB postgres transfer failed: {e}")
+            log.info("Falling back to COPY...")
             full_table = create_postgres_table(key, columns_info, pg_conn)
-            final_count = transfer_data_via_csv(duck_conn, pg_conn, full_table)
-            log.success(f"Successfully loaded {key}: {final_count:,} rows")
-            
-        finally:
-            pg_conn.close()
+            final_count = transfer_data(duck_conn, pg_conn, full_table)
+        log.success(f"Successfully loaded {key}: {final_count:,} rows")
             
     except Exception as e:
         log.error(f"Error processing {key}: {e}")
+        pg_conn.rollback()
         raise
     finally:
-        duck_conn.close()
+        duck_conn.execute("DROP TABLE IF EXISTS source_data")
+
+def split_csv_into_chunks(
+        filepath          : str, 
+        temp_dir          : str, 
+        target_chunk_size : int
+    ) -> Iterator[Tuple[int, str]]:
+
+    base_name = Path(filepath).stem
+    chunk_num = 0
+    chunk_file = None
+    
+    with open(filepath, 'r', encoding='utf-8', errors='replace', buffering=CHUNK_IO_BUFFER) as infile:
+        header = infile.readline()
+        
+        try:
+            for line in infile:
+                if chunk_file is None:
+                    chunk_num += 1
+                    chunk_path = os.path.join(temp_dir, f"{base_name}_chunk_{chunk_num:03d}.csv")
+                    chunk_file = open(chunk_path, 'w', encoding='utf-8', buffering=CHUNK_IO_BUFFER)
+                    chunk_file.write(header)
+                    current_chunk_size = 0
+                
+                chunk_file.write(line)
+                current_chunk_size += len(line)
+                
+                if current_chunk_size >= target_chunk_size:
+                    chunk_file.close()
+                    chunk_file = None
+                    yield chunk_num, chunk_path
+            
+            if chunk_file is not None:
+                chunk_file.close()
+                chunk_file = None
+                yield chunk_num, chunk_path
+        finally:
+            if chunk_file is not None:
+                chunk_file.close()
+                os.remove(chunk_path)
 
 def process_chunk_to_postgres(
-        chunk_lines      : List[str], 
+        chunk_path       : str, 
         chunk_num        : int, 
-        base_name        : str,                       
-        temp_dir         : str, 
         delimiter        : str, 
         pg_conn          : psycopg.Connection,
         key              : str, 
@@ -387,16 +466,9 @@ def process_chunk_to_postgres(
     ) -> dict:
  
     duck_conn = duckdb.connect(':memory:')
-    chunk_path = os.path.join(temp_dir, f"{base_name}_chunk_{chunk_num:03d}.csv")
     
     try:
-        with open(chunk_path, 'w', encoding='utf-8') as chunk_file:
-            chunk_file.writelines(chunk_lines)
-        
-        log.debug(f"Processing chunk {chunk_num}: {len(chunk_lines)-1:,} lines")
-        
-        chunk_lines.clear()
-        gc.collect()
+        log.debug(f"Processing chunk {chunk_num}: {get_file_size_gb(chunk_path):.2f} GB")
         
         try:
             original_count = load_csv_with_duckdb_autodetect(chunk_path, duck_conn, "chunk_data")
@@ -408,7 +480,7 @@ def process_chunk_to_postgres(
             
             for encoding in encodings:
                 try:
-                    duck_conn.execute(f"""
+                    original_count = duck_conn.execute(f"""
                         CREATE TABLE chunk_data AS 
                         SELECT * FROM read_csv(
                             '{chunk_path}',
@@ -418,9 +490,7 @@ def process_chunk_to_postgres(
                             all_varchar=true,
                             encoding='{encoding}'
                         )
-                    """)
-                    
-                    original_count = duck_conn.execute("SELECT COUNT(*) FROM chunk_data").fetchone()[0]
+                    """).fetchone()[0]
                     if original_count > 0:
                         log.debug(f"Chunk {chunk_num} loaded with manual method: {original_count:,} rows")
                         break
@@ -447,13 +517,11 @@ def process_chunk_to_postgres(
                     log.debug(f"Adjusted filter for chunk {chunk_num}: {filter_condition} → {adjusted_filter}")
                 
                 if adjusted_filter:
-                    duck_conn.execute(f"""
+                    filtered_count = duck_conn.execute(f"""
                         CREATE TABLE filtered_chunk AS 
                         SELECT * FROM chunk_data 
                         WHERE {adjusted_filter}
-                    """)
-                    
-                    filtered_count = duck_conn.execute("SELECT COUNT(*) FROM filtered_chunk").fetchone()[0]
+                    """).fetchone()[0]
                     duck_conn.execute("DROP TABLE chunk_data")
                     duck_conn.execute("ALTER TABLE filtered_chunk RENAME TO chunk_data")
                     
@@ -472,39 +540,13 @@ def process_chunk_to_postgres(
             columns_info = duck_conn.execute("DESCRIBE chunk_data").fetchall()
             full_table = create_postgres_table(key, columns_info, pg_conn)
         else:
-            clean_name = key.lower().replace('-', '_').replace(' ', '_')
-            full_table = f"{schema_name}.{clean_name}"
+            full_table = postgres_table_name(key, schema_name)
         
-        temp_csv = os.path.join(temp_dir, f"{base_name}_transfer_{chunk_num:03d}.csv")
+        with pg_conn.cursor() as cur:
+            copy_duckdb_table(duck_conn, cur, "chunk_data", full_table)
         
-        try:
-            duck_conn.execute(f"COPY chunk_data TO '{temp_csv}' (FORMAT CSV, HEADER)")
-            
-            with pg_conn.cursor() as cur:
-                with open(temp_csv, 'r', encoding='utf-8') as f:
-                    if is_first_chunk:
-                        with cur.copy(f"COPY {full_table} FROM STDIN WITH CSV HEADER") as copy:
-                            while True:
-                                data = f.read(8192)
-                                if not data:
-                                    break
-                                copy.write(data)
-                    else:
-                        
-                        next(f)
-                        with cur.copy(f"COPY {full_table} FROM STDIN WITH CSV") as copy:
-                            while True:
-                                data = f.read(8192)
-                                if not data:
-                                    break
-                                copy.write(data)
-            
-            log.debug(f"Transferred chunk {chunk_num}: {filtered_count:,} rows")
-            return {'rows': filtered_count, 'original_rows': original_count}
-            
-        finally:
-            if os.path.exists(temp_csv):
-                os.remove(temp_csv)
+        log.debug(f"Transferred chunk {chunk_num}: {filtered_count:,} rows")
+        return {'rows': filtered_count, 'original_rows': original_count}
         
     finally:
         if os.path.exists(chunk_path):
@@ -512,84 +554,90 @@ def process_chunk_to_postgres(
         duck_conn.close()
         gc.collect()
 
-def insert_large_file_streaming(key: str, filepath: str, filter_condition: str = None):
+def copy_file_to_postgres(key: str, filepath: str, pg_conn: psycopg.Connection) -> int:
+    suffix = Path(filepath).suffix.lower()
+    if suffix not in ['.csv', '.tsv']:
+        raise Exception(f"Direct COPY only handles .csv and .tsv files, not {suffix}")
+    
+    is_tsv = suffix == '.tsv'
+    delimiter = '\t' if is_tsv else ','
+    
+    with open(filepath, 'r', encoding='utf-8-sig', newline='') as f:
+        first_line = f.readline()
+    
+    try:
+        sniffed = csv.Sniffer().sniff(first_line, delimiters=',\t;|').delimiter
+    except csv.Error as e:
+        raise Exception(f"Could not detect delimiter: {e}")
+    if sniffed != delimiter:
+        raise Exception(f"Detected delimiter {sniffed!r} does not match {delimiter!r} for {suffix}")
+    
+    header = next(csv.reader([first_line], delimiter=delimiter))
+    
+    # TSV sources don't quote fields, so use a quote character that never appears in the data
+    options = "FORMAT csv, HEADER true, DELIMITER E'\\t', QUOTE E'\\x01'" if is_tsv else "FORMAT csv, HEADER true"
+    
+    # All-or-nothing: any bad row rolls the table back so the caller can fall back to DuckDB
+    with pg_conn.transaction():
+        full_table = create_postgres_table(key, [(col,) for col in header], pg_conn)
+        
+        with pg_conn.cursor() as cur:
+            with open(filepath, 'rb') as f:
+                with cur.copy(f"COPY {full_table} FROM STDIN WITH ({options})") as copy:
+                    for data in iter(lambda: f.read(CHUNK_IO_BUFFER), b''):
+                        copy.write(data)
+            
+            count = cur.rowcount
+        
+        set_table_logged(full_table, pg_conn)
+    
+    return count
+
+def insert_large_file_streaming(key: str, filepath: str, pg_conn: psycopg.Connection, filter_condition: str = None):
     log.info(f"Large file detected, using streaming approach")
     if filter_condition:
         log.info(f"Will apply filter to each chunk: {filter_condition}")
-
-    pg_conn = get_postgres_connection()
+    else:
+        try:
+            count = copy_file_to_postgres(key, filepath, pg_conn)
+            log.success(f"Successfully copied {key}: {count:,} rows")
+            return count
+        except Exception as e:
+            log.warning(f"Direct COPY failed: {e}")
+            log.info("Falling back to chunked DuckDB loading...")
     
     try:
         table_created = False
-        full_table = None
         total_rows = 0
         total_filtered_rows = 0
         
         temp_dir = tempfile.gettempdir()
-        base_name = Path(filepath).stem
         target_chunk_size = 500 * 1024 * 1024
         chunk_num = 0
         
-        with open(filepath, 'r', encoding='utf-8', errors='replace') as infile:
-            header = infile.readline()
-            
-            current_chunk_size = 0
-            chunk_lines = [header]
-            
-            for line in infile:
-                chunk_lines.append(line)
-                current_chunk_size += len(line.encode('utf-8'))
-                
-                if current_chunk_size >= target_chunk_size:
-                    chunk_num += 1
-                    
-                    chunk_result = process_chunk_to_postgres(
-                        chunk_lines, chunk_num, base_name, temp_dir,
-                        None, pg_conn, key,
-                        is_first_chunk=not table_created,
-                        filter_condition=filter_condition
-                    )
-                    
-                    if chunk_result and chunk_result['rows'] > 0:
-                        total_rows += chunk_result['original_rows']
-                        total_filtered_rows += chunk_result['rows']
-                        table_created = True
-                        
-                        pg_conn.commit()
-                        
-                        if filter_condition:
-                            filter_pct = chunk_result['rows'] / chunk_result['original_rows'] * 100 if chunk_result['original_rows'] > 0 else 0
-                            log.success(f"Committed chunk {chunk_num}: {chunk_result['original_rows']:,} → {chunk_result['rows']:,} rows ({filter_pct:.1f}%) (total: {total_filtered_rows:,})")
-                        else:
-                            log.success(f"Committed chunk {chunk_num}: {chunk_result['rows']:,} rows (total: {total_filtered_rows:,})")
-                    
-                    chunk_lines.clear()
-                    chunk_lines = [header]
-                    current_chunk_size = len(header.encode('utf-8'))
-                    gc.collect()
+        for chunk_num, chunk_path in split_csv_into_chunks(filepath, temp_dir, target_chunk_size):
+            chunk_result = process_chunk_to_postgres(
+                chunk_path, chunk_num, None, pg_conn, key,
+                is_first_chunk=not table_created,
+                filter_condition=filter_condition
+            )
             
-            if len(chunk_lines) > 1:
-                chunk_num += 1
-                chunk_result = process_chunk_to_postgres(
-                    chunk_lines, chunk_num, base_name, temp_dir,
-                    None, pg_conn, key,
-                    is_first_chunk=not table_created,
-                    filter_condition=filter_condition
-                )
-                
-                if chunk_result and chunk_result['rows'] > 0:
-                    total_rows += chunk_result['original_rows']
-                    total_filtered_rows += chunk_result['rows']
-                    pg_conn.commit()
-                    
-                    if filter_condition:
-                        filter_pct = chunk_result['rows'] / chunk_result['original_rows'] * 100 if chunk_result['original_rows'] > 0 else 0
-                        log.success(f"Committed final chunk {chunk_num}: {chunk_result['original_rows']:,} → {chunk_result['rows']:,} rows ({filter_pct:.1f}%) (total: {total_filtered_rows:,})")
-                    else:
-                        log.success(f"Committed final chunk {chunk_num}: {chunk_result['rows']:,} rows (total: {total_filtered_rows:,})")
+            if chunk_result and chunk_result['rows'] > 0:
+                total_rows += chunk_result['original_rows']
+                total_filtered_rows += chunk_result['rows']
+                table_created = True
                 
-                chunk_lines.clear()
-                gc.collect()
+                if filter_condition:
+                    filter_pct = chunk_result['rows'] / chunk_result['original_rows'] * 100 if chunk_result['original_rows'] > 0 else 0
+                    log.success(f"Loaded chunk {chunk_num}: {chunk_result['original_rows']:,} → {chunk_result['rows']:,} rows ({filter_pct:.1f}%) (total: {total_filtered_rows:,})")
+                else:
+                    log.success(f"Loaded chunk {chunk_num}: {chunk_result['rows']:,} rows (total: {total_filtered_rows:,})")
+        
+        if table_created:
+            set_table_logged(postgres_table_name(key), pg_conn)
+        
+        # Single commit for the whole file; a failure rolls back every chunk
+        pg_conn.commit()
         
         if filter_condition and total_rows > 0:
             overall_pct = total_filtered_rows / total_rows * 100
@@ -603,10 +651,8 @@ def insert_large_file_streaming(key: str, filepath: str, filter_condition: str =
         log.error(f"Error streaming {key}: {e}")
         pg_conn.rollback()
         raise
-    finally:
-        pg_conn.close()
 
-def insert_single_file(key: str, filepath: str, filter_condition: str = None):
+def insert_single_file(key: str, filepath: str, pg_conn: psycopg.Connection, duck_conn: duckdb.DuckDBPyConnection, filter_condition: str = None):
     log.info(f"Processing {key} from {filepath}")
     if filter_condition:
         log.info(f"Applying filter: {filter_condition}")
@@ -619,11 +665,11 @@ def insert_single_file(key: str, filepath: str, filter_condition: str = None):
     log.debug(f"File size: {file_size_gb:.2f} GB")
     
     if file_size_gb > 1.0:
-        return insert_large_file_streaming(key, filepath, filter_condition)
+        return insert_large_file_streaming(key, filepath, pg_conn, filter_condition)
     else:
-        return insert_small_file_standard(key, filepath, filter_condition)
+        return insert_small_file_standard(key, filepath, pg_conn, duck_conn, filter_condition)
 
-def insert_source(key: str, path: str, filter_condition: str = None):
+def insert_source(key: str, path: str, pg_conn: psycopg.Connection, duck_conn: duckdb.DuckDBPyConnection, filter_condition: str = None):
     files = get_files_from_path(path)
     
     if not files:
@@ -632,7 +678,7 @@ def insert_source(key: str, path: str, filter_condition: str = None):
     
     for file_key, filepath in files:
         final_key = key if len(files) == 1 else f"{key}_{file_key}"
-        insert_single_file(final_key, filepath, filter_condition)
+        insert_single_file(final_key, filepath, pg_conn, duck_conn, filter_condition)
 
 
 if __name__ == "__main__":
@@ -647,8 +693,20 @@ if __name__ == "__main__":
         'wiz_species_names' : r'datasets\wiz\SpeciesNames.csv'
     }
     
-    for key, path in paths.items():
-        if 'occurences' in key:
-            insert_source(key, path, filter_condition="kingdom = 'Plantae'")
-        else:
-            insert_source(key, path)
\ No newline at end of file
+    pg_conn = get_postgres_connection()
+    duck_conn = duckdb.connect(':memory:')
+    
+    try:
+        attach_postgres(duck_conn)
+    except Exception as e:
+        log.warning(f"Could not attach Postgres to DuckDB, small files will use COPY: {e}")
+    
+    try:
+        for key, path in paths.items():
+            if 'occurences' in key:
+                insert_source(key, path, pg_conn, duck_conn, filter_condition="kingdom = 'Plantae'")
+            else:
+                insert_source(key, path, pg_conn, duck_conn)
+    finally:
+        duck_conn.close()
+        pg_conn.close()
\ No newline at end of file
@@ -1,69 +1,155 @@
+import io
 import csv
+import os
 import re
+import multiprocessing
+import pandas as pd
+from functools import lru_cache
 from pathlib import Path
+from typing import List, Optional, Tuple
 from loguru import logger
 
 log = logger.bind(tags=["wfo-etl"])
 
 input_dir = Path("datasets/World Flora Online/families")
 output_dir = Path("dbt/seeds/wfo")
-output_dir.mkdir(parents=True, exist_ok=True)
 output_csv = output_dir / "classification.csv"
 
+_SANITIZE_RE = re.compile(r"[^a-z0-9_]")
+_FAMILY_RE = re.compile(r"(.+?)_wfo-(\d+)")
+
+@lru_cache(maxsize=None)
 def sanitize_column(name: str) -> str:
-    return re.sub(r"[^a-z0-9_]", "", name.strip().lower().replace(" ", "_"))
+    return _SANITIZE_RE.sub("", name.strip().lower().replace(" ", "_"))
+
+_UTF8_BOM = b"\xef\xbb\xbf"
 
-writer = None
-written_rows = 0
-skipped_files = 0
+def check_field_counts(text: str) -> List[str]:
+    reader = csv.reader(io.StringIO(text))
+    header = next(reader, [])
+    for row in reader:
+        if row and len(row) != len(header):
+            raise pd.errors.ParserError(f"Expected {len(header)} fields in line {reader.line_num}, saw {len(row)}")
+    return header
 
-with output_csv.open("w", newline='', encoding="utf-8") as out_f:
-    for family_dir in sorted(input_dir.iterdir()):
-        classification_file = family_dir / "classification.csv"
-        if not classification_file.exists():
-            log.warning(f"Missing: {classification_file}")
+def read_family(classification_file: Path, data: bytes, family_name: str, wfo_id: str) -> Optional[pd.DataFrame]:
+    utf8 = "utf-8-sig" if data.startswith(_UTF8_BOM) else "utf-8"
+
+    for encoding in (utf8, "latin-1"):
+        try:
+            text = data.decode(encoding)
+        except UnicodeDecodeError:
             continue
 
-        family_folder = family_dir.name
-        match = re.match(r"(.+?)_wfo-(\d+)", family_folder)
-        if not match:
-            log.warning(f"Unrecognized folder name format: {family_folder}")
+        # pandas silently shifts or pads ragged rows, so reject them up front
+        try:
+            header = check_field_counts(text)
+            df = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False, index_col=False)
+        except (csv.Error, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            log.error(f"✗ Skipped: {classification_file} — CSV error: {e}")
+            return None
+
+        # Name columns from the raw header, not pandas' Unnamed/.1 renames, so both paths agree
+        df.columns = [sanitize_column(h) for h in header]
+        df.insert(0, "wfo_id", wfo_id)
+        df.insert(0, "family_name", family_name)
+
+        log.info(f"✓ Processed: {classification_file} using {encoding}")
+        return df
+
+    log.error(f"✗ Skipped: {classification_file} — unknown encoding")
+    return None
+
+def append_family(classification_file: Path, data: bytes, family_name: str, wfo_id: str) -> Optional[Tuple[List[str], int, bytes]]:
+    # Without quotes no field can hold a delimiter or newline, so rows can be copied verbatim
+    if b'"' in data:
+        return None
+
+    data = data.removeprefix(_UTF8_BOM)
+    try:
+        data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+    header, _, body = data.partition(b"\n")
+    if not header.strip():
+        return None
+
+    fields = header.decode("utf-8").rstrip("\r").split(",")
+    columns = ["family_name", "wfo_id"] + [sanitize_column(h) for h in fields]
+    prefix = f"{family_name},{wfo_id},".encode("utf-8")
+
+    rows = []
+    for line in body.splitlines():
+        if not line.strip():
             continue
-        family_name, wfo_id = match.groups()
-
-        for encoding in ("utf-8", "utf-8-sig", "latin-1"):
-            try:
-                with classification_file.open("r", encoding=encoding) as in_f:
-                    reader = csv.DictReader(in_f)
-
-                    # Sanitize header names
-                    if writer is None:
-                        sanitized_fields = [sanitize_column(h) for h in reader.fieldnames]
-                        fieldnames = ["family_name", "wfo_id"] + sanitized_fields
-                        writer = csv.DictWriter(out_f, fieldnames=fieldnames)
-                        writer.writeheader()
-
-                    try:
-                        for row in reader:
-                            sanitized_row = {
-                                sanitize_column(k): v for k, v in row.items()
-                            }
-                            sanitized_row["family_name"] = family_name
-                            sanitized_row["wfo_id"] = wfo_id
-                            writer.writerow(sanitized_row)
-                            written_rows += 1
-                    except csv.Error as e:
-                        log.error(f"✗ Skipped: {classification_file} — CSV error: {e}")
-                        skipped_files += 1
-                        break
-
-
-                log.info(f"✓ Processed: {classification_file} using {encoding}")
-                break
-            except UnicodeDecodeError:
+        # Ragged rows go to read_family, which rejects the file
+        if line.count(b",") != len(fields) - 1:
+            return None
+        rows.append(prefix + line.rstrip(b"\r") + b"\n")
+
+    log.info(f"✓ Processed: {classification_file} using byte append")
+    return columns, len(rows), b"".join(rows)
+
+def process_family(family_path: str) -> Optional[Tuple[List[str], int, bytes]]:
+    classification_file = Path(family_path) / "classification.csv"
+    if not classification_file.exists():
+        log.warning(f"Missing: {classification_file}")
+        return None
+
+    family_folder = os.path.basename(family_path)
+    match = _FAMILY_RE.match(family_folder)
+    if not match:
+        log.warning(f"Unrecognized folder name format: {family_folder}")
+        return None
+    family_name, wfo_id = match.groups()
+
+    data = classification_file.read_bytes()
+
+    result = append_family(classification_file, data, family_name, wfo_id)
+    if result is not None:
+        return result
+
+    df = read_family(classification_file, data, family_name, wfo_id)
+    if df is None:
+        return None
+    return list(df.columns), len(df), df.to_csv(index=False, header=False, lineterminator="\n").encode("utf-8")
+
+def reorder_chunk(chunk: bytes, columns: List[str], header: List[str]) -> bytes:
+    df = pd.read_csv(io.BytesIO(chunk), header=None, names=columns, dtype=str, keep_default_na=False)
+    return df[header].to_csv(index=False, header=False, lineterminator="\n").encode("utf-8")
+
+if __name__ == "__main__":
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    with os.scandir(input_dir) as it:
+        family_paths = [entry.path for entry in sorted(it, key=lambda e: e.name) if entry.is_dir()]
+
+    header = None
+    written_rows = 0
+    skipped_files = 0
+
+    with output_csv.open("wb") as out_f, multiprocessing.Pool() as pool:
+        # imap keeps family order, so the output is identical to a serial run
+        results = pool.imap(process_family, family_paths, chunksize=8)
+        for family_path, result in zip(family_paths, results):
+            if result is None:
+                skipped_files += 1
                 continue
-        else:
-            log.error(f"✗ Skipped: {classification_file} — unknown encoding")
-            skipped_files += 1
 
-log.success(f"✅ Done: wrote {written_rows} rows from {len(list(input_dir.iterdir())) - skipped_files} families")
+            columns, row_count, chunk = result
+
+            if header is None:
+                header = columns
+                out_f.write((",".join(header) + "\n").encode("utf-8"))
+            elif columns != header:
+                if sorted(columns) != sorted(header) or len(set(header)) != len(header):
+                    log.error(f"✗ Skipped: {family_path} — columns {columns} do not match {header}")
+                    skipped_files += 1
+                    continue
+                chunk = reorder_chunk(chunk, columns, header)
+
+            out_f.write(chunk)
+            written_rows += row_count
+
+    log.success(f"✅ Done: wrote {written_rows} rows from {len(family_paths) - skipped_files} families")